@@ -0,0 +1,213 @@
+"""
+Shared helpers for the extension build.py scripts.
+
+Each build.py puts this directory on sys.path, declares its flags and
+sources, and calls these helpers from build(). Every helper works
+relative to the current directory, which is always the extension's own
+directory: main() chdirs to the one it is given, and so does
+build_all.py. Log lines are tagged with that directory's name.
+
+Passing --fast on the command line swaps -O2 for -O0 -g0 (see OPT).
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable
+
+ROOT = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "muemacs"
+STATE_FILE = ".build_state.json"
+
+# Dev loop: skip the -O2 optimisation passes and debug info
+FAST = "--fast" in sys.argv
+OPT = ["-O0", "-g0"] if FAST else ["-O2"]
+
+# Link-time optimisation: link with OPT + LTO, compile with LTO_CFLAGS.
+# Fat objects keep the .o files usable for a non-LTO link. Off for --fast.
+LTO = [] if FAST else ["-flto=auto"]
+LTO_CFLAGS = (LTO + ["-ffat-lto-objects"]) if LTO else []
+
+# Route compiles through sccache/ccache when one is installed.
+# Only ccache handles gfortran; compare compilers by content so a
+# reinstalled toolchain with a new mtime still hits the cache.
+_CCACHE = shutil.which("sccache") or shutil.which("ccache")
+CC = [_CCACHE, "gcc"] if _CCACHE else ["gcc"]
+_FCACHE = shutil.which("ccache")
+FC = [_FCACHE, "gfortran"] if _FCACHE else ["gfortran"]
+if _FCACHE:
+    os.environ.setdefault("CCACHE_COMPILERCHECK", "content")
+
+# μEmacs source tree first, then installed headers
+INCLUDE_PATHS = [
+    ROOT.parent.parent / "μEmacs" / "include",
+    Path("/usr/local/include"),
+    Path("/usr/include"),
+]
+
+
+def _tag() -> str:
+    return Path.cwd().name
+
+
+def run(cmd: list, desc: str, env: dict | None = None) -> int:
+    # Flush so the banner lands before the compiler's own output when
+    # stdout is a pipe or file
+    print(f"[{_tag()}] {desc}")
+    print(f"  $ {' '.join(map(str, cmd))}", flush=True)
+    # Compiler output streams straight to the terminal as it is produced.
+    # An absolute executable, no cwd= and close_fds=False let CPython use
+    # posix_spawn instead of fork+exec.
+    exe = shutil.which(cmd[0]) or cmd[0]
+    result = subprocess.run([exe] + [str(c) for c in cmd[1:]], env=env,
+                            close_fds=False)
+    if result.returncode != 0:
+        print(f"[{_tag()}] FAILED: {desc} (exit {result.returncode})", file=sys.stderr)
+    return result.returncode
+
+
+def run_parallel(steps: list[tuple[list, str]]) -> int:
+    """Run independent (cmd, desc) steps concurrently; stop at the first failure."""
+    with ThreadPoolExecutor(max_workers=min(len(steps), os.cpu_count() or 1)) as pool:
+        jobs = [pool.submit(run, cmd, desc) for cmd, desc in steps]
+        for job in as_completed(jobs):
+            if job.result() != 0:
+                for pending in jobs:
+                    pending.cancel()
+                return 1
+    return 0
+
+
+def find_uep_include(header: str = "extension_api.h",
+                     extra: Iterable = ()) -> Path | None:
+    """First include dir (extra ones first) containing uep/<header>."""
+    for inc in [*map(Path, extra), *INCLUDE_PATHS]:
+        if (inc / "uep" / header).exists():
+            return inc
+    return None
+
+
+def uep_headers(inc: Path | None) -> list[Path]:
+    """The uep/*.h headers under inc, for fingerprinting."""
+    return sorted(inc.glob("uep/*.h")) if inc else []
+
+
+def compile_step(src, cflags: list[str], inc: Path | None = None,
+                 obj=None) -> tuple[list, str]:
+    """(cmd, desc) compiling one C source to an object file."""
+    src = Path(src)
+    cmd = CC + cflags + ["-c", "-o", obj or src.with_suffix(".o")]
+    if inc:
+        cmd.extend(["-I", inc])
+    cmd.append(src)
+    return cmd, f"Compiling {src.name}"
+
+
+def compile_parallel(sources: list, cflags: list[str],
+                     inc: Path | None = None) -> list[Path] | None:
+    """Compile each source to <stem>.o concurrently; None if any failed."""
+    objects = [Path(src).with_suffix(".o") for src in sources]
+    if run_parallel([compile_step(src, cflags, inc) for src in sources]) != 0:
+        return None
+    return objects
+
+
+def link_shared(objs: Iterable, out: str, ldflags: Iterable = (),
+                linker: str = "gcc") -> int:
+    return run([linker, "-shared", "-o", out, *objs, *ldflags], f"Linking {out}")
+
+
+def fingerprint(sources: Iterable, *extra) -> str:
+    """Hash source contents together with flags, include path, etc."""
+    h = hashlib.blake2b(digest_size=16)
+    for src in sorted(map(str, sources)):
+        h.update(Path(src).read_bytes())
+    h.update(repr(extra).encode())
+    return h.hexdigest()
+
+
+def up_to_date(target: str, digest: str) -> bool:
+    """True if target exists and was last built from the same fingerprint."""
+    try:
+        state = json.loads(Path(STATE_FILE).read_text())
+    except (OSError, ValueError):
+        return False
+    if state.get("fingerprint") == digest and Path(target).exists():
+        print(f"[{_tag()}] {target} is up to date")
+        return True
+    return False
+
+
+def _write_json(path: Path, data) -> None:
+    """Write data as JSON atomically (tmp file + rename)."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def save_fingerprint(digest: str) -> None:
+    _write_json(Path(STATE_FILE), {"fingerprint": digest})
+
+
+def cached_json(name: str, key, compute: Callable[[], object]):
+    """Return compute()'s result, cached in CACHE_DIR/name under key.
+
+    For slow toolchain queries whose answer only changes with the tool
+    itself; key should identify the tool (version output, binary mtime).
+    Exceptions from compute() propagate and nothing is cached. Failing to
+    read or write the cache just means recomputing next time.
+    """
+    path = CACHE_DIR / name
+    try:
+        cached = json.loads(path.read_text())
+        if cached["key"] == key:
+            return cached["value"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    value = compute()
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _write_json(path, {"key": key, "value": value})
+    except OSError:
+        pass
+    return value
+
+
+def report(target: str) -> int:
+    """Check that target was produced and print its size."""
+    path = Path(target)
+    if not path.exists():
+        print(f"[{_tag()}] ERROR: {target} not created", file=sys.stderr)
+        return 1
+    print(f"[{_tag()}] Built {target} ({path.stat().st_size:,} bytes)")
+    return 0
+
+
+def clean(patterns: Iterable[str]) -> None:
+    # One directory pass, matching every pattern with a single regex
+    matches = re.compile("|".join(fnmatch.translate(p)
+                                  for p in [STATE_FILE, *patterns])).match
+    with os.scandir() as entries:
+        for entry in entries:
+            if matches(entry.name) and entry.is_file(follow_symlinks=False):
+                os.unlink(entry.path)
+                print(f"Removed {entry.name}")
+
+
+def main(build: Callable[[], int], clean_patterns: Iterable[str],
+         ext_dir: Path) -> None:
+    """Script entry point: chdir to ext_dir, then build or clean."""
+    os.chdir(ext_dir)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "clean":
+        clean(clean_patterns)
+    else:
+        sys.exit(build())
@@ -6,34 +6,24 @@ Uses gnatbind to generate proper elaboration code (adainit/adafinal).
 Without this, Ada's secondary stack is uninitialized and causes crashes.
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
-TARGET = "ada_fuzzy.so"
-CFLAGS = ["-O2", "-fPIC", "-Wall"]
-ADAFLAGS = ["-O2", "-fPIC"]
-
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import CC, OPT, link_shared, main, report, run, run_parallel
 
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[ada_fuzzy] {desc}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED: {result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
+TARGET = "ada_fuzzy.so"
+CFLAGS = OPT + ["-fPIC", "-Wall", "-pipe"]
+ADAFLAGS = OPT + ["-fPIC"]
 
 
 def build() -> int:
-    here = Path(__file__).parent
-
-    # 1. Compile bridge.c to bridge.o
-    if run(["gcc"] + CFLAGS + ["-c", "-o", "bridge.o", "bridge.c"],
-           "Compiling bridge.c") != 0:
-        return 1
-
-    # 2. Compile Ada code (fuzzy.adb)
-    if run(["gnatmake", "-c"] + ADAFLAGS + ["fuzzy.adb"],
-           "Compiling fuzzy.adb") != 0:
+    # 1-2. bridge.c and fuzzy.adb don't depend on each other, so compile
+    # them concurrently. Everything after this needs fuzzy.o/fuzzy.ali.
+    if run_parallel([
+        (CC + CFLAGS + ["-c", "-o", "bridge.o", "bridge.c"], "Compiling bridge.c"),
+        (["gnatmake", "-c"] + ADAFLAGS + ["fuzzy.adb"], "Compiling fuzzy.adb"),
+    ]) != 0:
         return 1
 
     # 3. Generate binding/elaboration code (creates b~fuzzy.adb)
@@ -47,30 +37,12 @@ def build() -> int:
         return 1
 
     # 5. Link everything together
-    if run(["gcc", "-shared", "-o", TARGET,
-            "bridge.o", "fuzzy.o", "b~fuzzy.o", "-lgnat"],
-           "Linking ada_fuzzy.so") != 0:
+    if link_shared(["bridge.o", "fuzzy.o", "b~fuzzy.o"], TARGET, ["-lgnat"]) != 0:
         return 1
 
-    print(f"[ada_fuzzy] Built {TARGET}")
-    return 0
-
-
-def clean():
-    import glob
-    here = Path(__file__).parent
-    patterns = ["*.o", "*.ali", "b~fuzzy.adb", "b~fuzzy.ads", TARGET]
-    for pattern in patterns:
-        for f in here.glob(pattern):
-            f.unlink()
-            print(f"Removed {f.name}")
+    return report(TARGET)
 
 
 if __name__ == "__main__":
-    import os
-    os.chdir(Path(__file__).parent)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, ["*.o", "*.ali", "b~fuzzy.adb", "b~fuzzy.ads", TARGET],
+         Path(__file__).parent)
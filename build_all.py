@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Build every extension that ships a build.py, in parallel.
+
+Each extension's build() runs in its own worker process (they chdir and
+spawn their own compilers), so total time approaches the slowest single
+extension rather than the sum of all of them.
+
+Usage: python3 build_all.py [--fast] [extension ...]
+
+With no extension names, builds every */build.py outside _disabled/.
+--fast is seen by each build script (see _build_common.OPT).
+"""
+
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+
+
+def find_extensions() -> list[str]:
+    """Names of extension directories that have a build.py."""
+    return sorted(p.parent.name for p in ROOT.glob("*/build.py")
+                  if not p.parent.name.startswith("_"))
+
+
+def build_one(name: str) -> int:
+    """Import <name>/build.py and run its build() from inside that directory."""
+    ext_dir = ROOT / name
+    os.chdir(ext_dir)
+    spec = importlib.util.spec_from_file_location(f"{name}_build", ext_dir / "build.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.build()
+
+
+def main(argv: list[str]) -> int:
+    names = [a for a in argv if not a.startswith("-")] or find_extensions()
+    missing = [n for n in names if not (ROOT / n / "build.py").exists()]
+    if missing:
+        print(f"[build_all] No build.py for: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=min(len(names), os.cpu_count() or 1)) as pool:
+        jobs = {pool.submit(build_one, name): name for name in names}
+        for job in as_completed(jobs):
+            name = jobs[job]
+            try:
+                rc = job.result()
+            except Exception as e:
+                print(f"[build_all] {name}: {e}", file=sys.stderr)
+                rc = 1
+            if rc != 0:
+                failed.append(name)
+
+    ok = len(names) - len(failed)
+    print(f"[build_all] {ok}/{len(names)} extension(s) built")
+    if failed:
+        print(f"[build_all] FAILED: {', '.join(sorted(failed))}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -9,87 +9,71 @@ Builds the git extension with:
 The Fortran code is the main implementation; C just provides API glue.
 """
 
-import subprocess
-import sys
 import re
+import sys
+from functools import lru_cache
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import (CACHE_DIR, FAST, FC, OPT, compile_step, find_uep_include,
+                           fingerprint, link_shared, main, report, run,
+                           save_fingerprint, uep_headers, up_to_date)
+
 TARGET = "c_git.so"
-CFLAGS = ["-O2", "-fPIC", "-Wall"]
-FFLAGS = ["-O2", "-fPIC", "-ffree-form"]
-SCRIPT_DIR = Path(__file__).parent.resolve()
-
-
-def get_api_version() -> int:
-    """Read API version from system header."""
-    for inc in ["/usr/local/include", "/usr/include"]:
-        header = Path(inc) / "uep" / "extension_api.h"
-        if header.exists():
-            content = header.read_text()
-            match = re.search(r'#define\s+UEMACS_API_VERSION\s+(\d+)', content)
-            if match:
-                return int(match.group(1))
+CFLAGS = OPT + ["-fPIC", "-pipe"] + ([] if FAST else ["-Wall"])
+# gfortran writes/reads .mod files here (-J) instead of the source dir
+FORTRAN_MOD_DIR = CACHE_DIR / "fortran"
+FFLAGS = OPT + ["-fPIC", "-ffree-form", "-pipe", f"-J{FORTRAN_MOD_DIR}"]
+_API_RE = re.compile(r'#define\s+UEMACS_API_VERSION\s+(\d+)')
+
+
+@lru_cache(maxsize=None)
+def _parse_api_version(header: Path, mtime_ns: int) -> int | None:
+    # mtime_ns is only part of the cache key: an edited header re-parses
+    content = header.read_text()
+    match = _API_RE.search(content)
+    return int(match.group(1)) if match else None
+
+
+def get_api_version(inc: Path | None) -> int:
+    """Read API version from the uep/extension_api.h bridge.c builds against."""
+    header = inc / "uep" / "extension_api.h" if inc else None
+    if header and header.exists():
+        version = _parse_api_version(header, header.stat().st_mtime_ns)
+        if version is not None:
+            return version
     return 4  # Default fallback
 
 
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[fortran_git] {desc}")
-    print(f"  $ {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=SCRIPT_DIR, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED:\n{result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
-
-
 def build() -> int:
-    api_version = get_api_version()
-    cflags = CFLAGS + [f"-DUEMACS_API_VERSION_BUILD={api_version}"]
+    inc = find_uep_include("extension.h")
+    cflags = CFLAGS + [f"-DUEMACS_API_VERSION_BUILD={get_api_version(inc)}"]
+
+    digest = fingerprint(["bridge.c", "git_ext.f90"] + uep_headers(inc), cflags, FFLAGS, inc)
+    if up_to_date(TARGET, digest):
+        return 0
 
     # 1. Compile bridge.c
-    if run(["gcc"] + cflags + ["-c", "-o", "bridge.o", "bridge.c"],
-           "Compiling bridge.c (C bridge)") != 0:
+    if run(*compile_step("bridge.c", cflags, inc)) != 0:
         return 1
 
     # 2. Compile git_ext.f90 (Fortran core)
-    if run(["gfortran"] + FFLAGS + ["-c", "-o", "git_ext.o", "git_ext.f90"],
+    FORTRAN_MOD_DIR.mkdir(parents=True, exist_ok=True)
+    if run(FC + FFLAGS + ["-c", "-o", "git_ext.o", "git_ext.f90"],
            "Compiling git_ext.f90 (Fortran core)") != 0:
         return 1
 
     # 3. Link everything into shared library
     # Use gfortran as linker to automatically include libgfortran
-    if run(["gfortran", "-shared", "-o", TARGET,
-            "bridge.o", "git_ext.o"],
-           f"Linking {TARGET}") != 0:
+    if link_shared(["bridge.o", "git_ext.o"], TARGET, linker="gfortran") != 0:
         return 1
 
-    # Verify output
-    so_path = SCRIPT_DIR / TARGET
-    if so_path.exists():
-        size = so_path.stat().st_size
-        print(f"[fortran_git] Built {TARGET} ({size:,} bytes)")
-        print(f"[fortran_git] Fortran core: 12 commands, buffer navigation")
-    else:
-        print(f"[fortran_git] ERROR: {TARGET} not created", file=sys.stderr)
+    if report(TARGET) != 0:
         return 1
-
+    save_fingerprint(digest)
+    print("[c_git] Fortran core: 12 commands, buffer navigation")
     return 0
 
 
-def clean():
-    patterns = [TARGET, "*.o", "*.mod"]
-    for pattern in patterns:
-        for f in SCRIPT_DIR.glob(pattern):
-            # Keep source files
-            if f.suffix not in ['.c', '.f90', '.py', '.md']:
-                f.unlink()
-                print(f"Removed {f.name}")
-
-
 if __name__ == "__main__":
-    import os
-    os.chdir(SCRIPT_DIR)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, [TARGET, "*.o", "*.mod"], Path(__file__).parent)
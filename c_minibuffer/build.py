@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 """Build script for c_minibuffer extension."""
 
-import subprocess
-import sys
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import (OPT, compile_step, find_uep_include, fingerprint,
+                           link_shared, main, report, run, save_fingerprint,
+                           uep_headers, up_to_date)
 
 # μEmacs source directory for headers
 UEMACS_DIR = os.path.expanduser(
@@ -11,36 +16,26 @@ UEMACS_DIR = os.path.expanduser(
 )
 INCLUDE_DIR = os.path.join(UEMACS_DIR, "include")
 
-def build():
+TARGET = "c_minibuffer.so"
+CFLAGS = ["-std=c23"] + OPT + ["-fPIC", "-pipe", "-Wall", "-Wextra"]
+
+
+def build() -> int:
     """Build the c_minibuffer shared library."""
+    inc = find_uep_include("extension.h", extra=[INCLUDE_DIR])
+
+    digest = fingerprint(["minibuffer.c"] + uep_headers(inc), CFLAGS, inc)
+    if up_to_date(TARGET, digest):
+        return 0
 
-    sources = ["minibuffer.c"]
-    output = "c_minibuffer.so"
-
-    cmd = [
-        "gcc",
-        "-std=c23",
-        "-shared",
-        "-fPIC",
-        "-O2",
-        "-Wall",
-        "-Wextra",
-        f"-I{INCLUDE_DIR}",
-        "-o", output,
-    ] + sources
-
-    print(f"Building {output}...")
-    print(" ".join(cmd))
-
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        print("Build failed!")
-        print(result.stderr)
+    if run(*compile_step("minibuffer.c", CFLAGS, inc)) != 0:
         return 1
+    if link_shared(["minibuffer.o"], TARGET) != 0:
+        return 1
+
+    save_fingerprint(digest)
+    return report(TARGET)
 
-    print(f"Successfully built {output}")
-    return 0
 
 if __name__ == "__main__":
-    sys.exit(build())
+    main(build, [TARGET, "*.o"], Path(__file__).parent)
@@ -8,72 +8,69 @@ The COBOL runtime is initialized to enable future COBOL modules.
 
 import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import (OPT, cached_json, compile_step, find_uep_include,
+                           fingerprint, link_shared, main, report, run,
+                           save_fingerprint, uep_headers, up_to_date)
+
 TARGET = "cobol_csv.so"
-CFLAGS = ["-O2", "-fPIC", "-Wall", "-std=c23"]
+CFLAGS = OPT + ["-fPIC", "-Wall", "-std=c23", "-pipe"]
 
 
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[cobol_csv] {desc}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED: {result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
+def _query_cobc() -> list[list[str]]:
+    cflags = subprocess.run(["cobc", "--cflags"], capture_output=True, text=True)
+    libs = subprocess.run(["cobc", "--libs"], capture_output=True, text=True)
+    if cflags.returncode != 0 or libs.returncode != 0:
+        raise RuntimeError("cobc --cflags/--libs failed")
+    return [cflags.stdout.strip().split(), libs.stdout.strip().split()]
 
 
-def build() -> int:
-    here = Path(__file__).parent
+@lru_cache(maxsize=None)
+def cobc_flags() -> tuple[list[str], list[str]]:
+    """Return (cflags, libs) reported by cobc.
+
+    The answer only changes when cobc does, so it's cached on disk keyed
+    by `cobc --version` output. Raises FileNotFoundError without cobc,
+    RuntimeError if cobc can't report its flags.
+    """
+    version = subprocess.run(["cobc", "--version"],
+                             capture_output=True, text=True).stdout
+    cflags, libs = cached_json("cobc_flags.json", version, _query_cobc)
+    return cflags, libs
 
+
+def build() -> int:
     # Get COBOL flags from cobc
     try:
-        cob_cflags = subprocess.run(
-            ["cobc", "--cflags"],
-            capture_output=True, text=True
-        ).stdout.strip().split()
-        cob_libs = subprocess.run(
-            ["cobc", "--libs"],
-            capture_output=True, text=True
-        ).stdout.strip().split()
+        cob_cflags, cob_libs = cobc_flags()
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
     except FileNotFoundError:
         print("ERROR: cobc not found. Install gnucobol:", file=sys.stderr)
         print("  sudo pacman -S gnucobol  # Arch", file=sys.stderr)
         print("  sudo apt install gnucobol  # Debian/Ubuntu", file=sys.stderr)
         return 1
 
+    inc = find_uep_include("extension.h")
+    digest = fingerprint(["bridge.c"] + uep_headers(inc), CFLAGS + cob_cflags + cob_libs, inc)
+    if up_to_date(TARGET, digest):
+        return 0
+
     # Compile bridge.c
-    compile_cmd = (
-        ["gcc"] + CFLAGS + cob_cflags +
-        ["-c", "-o", "bridge.o", "bridge.c"]
-    )
-    if run(compile_cmd, "Compiling bridge.c") != 0:
+    if run(*compile_step("bridge.c", CFLAGS + cob_cflags, inc)) != 0:
         return 1
 
     # Link shared library
-    link_cmd = (
-        ["gcc", "-shared", "-o", TARGET, "bridge.o"] + cob_libs
-    )
-    if run(link_cmd, f"Linking {TARGET}") != 0:
+    if link_shared(["bridge.o"], TARGET, cob_libs) != 0:
         return 1
 
-    print(f"[cobol_csv] Built {TARGET}")
-    return 0
-
-
-def clean():
-    here = Path(__file__).parent
-    patterns = ["*.o", TARGET]
-    for pattern in patterns:
-        for f in here.glob(pattern):
-            f.unlink()
-            print(f"Removed {f.name}")
+    save_fingerprint(digest)
+    return report(TARGET)
 
 
 if __name__ == "__main__":
-    import os
-    os.chdir(Path(__file__).parent)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, ["*.o", TARGET], Path(__file__).parent)
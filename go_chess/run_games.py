@@ -27,12 +27,21 @@ Default: 5 games, depth 6, all CPU cores
 Logging matches muEmacs style: [INFO], [DEBUG], [ERROR]
 """
 
-import subprocess
+import argparse
+import atexit
 import json
+import subprocess
 import sys
 import os
+import re
+import time
 from pathlib import Path
-from datetime import datetime
+
+# orjson parses the (multi-megabyte) opening book several times faster
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 CHESS_DIR = Path(__file__).parent.resolve()
 BOOK_PATH = Path.home() / ".config/muemacs/chess_book.json"
@@ -49,54 +58,107 @@ TEST_FILE = CHESS_DIR / "auto_games_test.go"
 # Overwritten each run - check after training completes or if errors occur.
 # Lost on reboot, but that's fine - it's just for debugging the current session.
 LOG_PATH = Path("/tmp/go_chess_training.log")
-_log_file = None
+# get_learning_stats() result, keyed by the book's mtime and size
+STATS_CACHE_PATH = Path("/tmp/go_chess_training.stats.json")
 
-def _init_log():
-    """Initialize log file handle."""
-    global _log_file
-    if _log_file is None:
-        try:
-            _log_file = open(LOG_PATH, "w", buffering=1)  # Overwrite, line buffered
-            _log_file.write(f"[{datetime.now().isoformat()}] Training session started\n")
-            _log_file.write(f"{'='*60}\n")
-        except Exception as e:
-            print(f"[WARN] Could not open log file: {e}", file=sys.stderr)
+# Timestamps have second resolution, so only reformat when the second
+# changes; Go's per-move [DEBUG] output makes this the hot path.
+_last_ts_sec = -1
+_last_ts_str = ""
 
-def _write_log(level, msg):
-    """Write to log file with timestamp."""
-    global _log_file
-    if _log_file is None:
-        _init_log()
-    if _log_file:
+# Log lines are encoded once, batched, and written out every
+# _LOG_FLUSH_LINES lines, when the second rolls over, on errors, and at
+# exit - one writev() per batch instead of one write() per line.
+_LOG_FLUSH_LINES = 256  # well under IOV_MAX (1024 on Linux)
+_log_buf = []
+
+def _open_log():
+    """Open (overwrite) the log file, falling back to /dev/null.
+
+    Either way the result is a real file, so the logging hot path never
+    has to check whether there is a log to write to.
+    """
+    try:
+        # Unbuffered, since batches go straight to the fd
+        f = open(LOG_PATH, "wb", buffering=0)
+        f.write(f"[{time.strftime('%Y-%m-%dT%H:%M:%S')}] Training session started\n"
+                f"{'='*60}\n".encode())
+        return f
+    except Exception as e:
+        print(f"[WARN] Could not open log file: {e}", file=sys.stderr)
+        return open(os.devnull, "wb", buffering=0)
+
+def _flush_log():
+    """Write out buffered log lines with a single writev()."""
+    if _log_buf:
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            _log_file.write(f"[{timestamp}] [{level}] {msg}\n")
+            bufs = _log_buf
+            while bufs:
+                written = os.writev(_log_file.fileno(), bufs)
+                # Short write: drop what the kernel took, retry the rest
+                i = 0
+                while i < len(bufs) and written >= len(bufs[i]):
+                    written -= len(bufs[i])
+                    i += 1
+                bufs = bufs[i:]
+                if written:
+                    bufs[0] = bufs[0][written:]
         except:
             pass  # Don't crash on log failures
+    _log_buf.clear()
+
+def _close_log():
+    """Write out the last batch and close the log (run at exit)."""
+    _flush_log()
+    _log_file.close()
+
+def _write_log(level, msg):
+    """Write to log file with timestamp."""
+    global _last_ts_sec, _last_ts_str
+    try:
+        sec = int(time.time())
+        if sec != _last_ts_sec:
+            _flush_log()
+            _last_ts_sec = sec
+            _last_ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        _log_buf.append("".join(["[", _last_ts_str, "] [", level, "] ", msg, "\n"]).encode())
+        if len(_log_buf) >= _LOG_FLUSH_LINES:
+            _flush_log()
+    except:
+        pass  # Don't crash on log failures
+
+# Command line - see the module docstring, which doubles as --help
+_parser = argparse.ArgumentParser(add_help=False)
+_parser.add_argument("num_games", type=int, nargs="?")
+_parser.add_argument("-d", "--debug", action="store_true")
+_parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 8)
+_parser.add_argument("--depth", type=int, default=6)
+_parser.add_argument("--depth-white", type=int)
+_parser.add_argument("--depth-black", type=int)
+_parser.add_argument("--draw-value", type=float, default=0.5)
+_parser.add_argument("--contempt-white", type=float)
+_parser.add_argument("--contempt-black", type=float)
+_parser.add_argument("--reset", action="store_true")
+_parser.add_argument("-h", "--help", action="store_true")
+ARGS = _parser.parse_args()
+
+if ARGS.help:
+    print(__doc__)
+    sys.exit(0)
+
+# Opened here rather than lazily, once we know this is a real run, so
+# --help or a bad option doesn't clobber the previous session's log
+_log_file = _open_log()
+atexit.register(_close_log)
+
+DEBUG = ARGS.debug
+
+# Worker count (default: all CPUs)
+WORKERS = ARGS.workers
 
-DEBUG = "--debug" in sys.argv or "-d" in sys.argv
-
-# Get worker count from args or use all CPUs
-WORKERS = os.cpu_count() or 8
-for arg in sys.argv:
-    if arg.startswith("-w") and arg[2:].isdigit():
-        WORKERS = int(arg[2:])
-    elif arg.startswith("--workers="):
-        WORKERS = int(arg.split("=")[1])
-
-# Get search depth from args (default: 6)
-DEPTH_DEFAULT = 6
-DEPTH_WHITE = DEPTH_DEFAULT
-DEPTH_BLACK = DEPTH_DEFAULT
-for arg in sys.argv:
-    if arg.startswith("--depth="):
-        DEPTH_DEFAULT = int(arg.split("=")[1])
-        DEPTH_WHITE = DEPTH_DEFAULT
-        DEPTH_BLACK = DEPTH_DEFAULT
-    elif arg.startswith("--depth-white="):
-        DEPTH_WHITE = int(arg.split("=")[1])
-    elif arg.startswith("--depth-black="):
-        DEPTH_BLACK = int(arg.split("=")[1])
+# Search depth (default: 6); per-side flags override --depth
+DEPTH_WHITE = ARGS.depth if ARGS.depth_white is None else ARGS.depth_white
+DEPTH_BLACK = ARGS.depth if ARGS.depth_black is None else ARGS.depth_black
 
 # Warning for deep search
 if DEPTH_WHITE > 7 or DEPTH_BLACK > 7:
@@ -105,16 +167,9 @@ if DEPTH_WHITE > 7 or DEPTH_BLACK > 7:
 # Get unified draw value (symmetric for self-play training)
 # 0.5 = standard (draw worth half a win)
 # Lower values encourage decisive games (faster learning)
-DRAW_VALUE = 0.5
-CONTEMPT_WHITE = None  # None = use DRAW_VALUE
-CONTEMPT_BLACK = None  # None = use DRAW_VALUE
-for arg in sys.argv:
-    if arg.startswith("--draw-value="):
-        DRAW_VALUE = float(arg.split("=")[1])
-    elif arg.startswith("--contempt-white="):
-        CONTEMPT_WHITE = float(arg.split("=")[1])
-    elif arg.startswith("--contempt-black="):
-        CONTEMPT_BLACK = float(arg.split("=")[1])
+DRAW_VALUE = ARGS.draw_value
+CONTEMPT_WHITE = ARGS.contempt_white  # None = use DRAW_VALUE
+CONTEMPT_BLACK = ARGS.contempt_black  # None = use DRAW_VALUE
 
 # If only one side's contempt is set, use DRAW_VALUE for the other
 if CONTEMPT_WHITE is not None and CONTEMPT_BLACK is None:
@@ -122,10 +177,6 @@ if CONTEMPT_WHITE is not None and CONTEMPT_BLACK is None:
 if CONTEMPT_BLACK is not None and CONTEMPT_WHITE is None:
     CONTEMPT_WHITE = DRAW_VALUE
 
-if "--help" in sys.argv or "-h" in sys.argv:
-    print(__doc__)
-    sys.exit(0)
-
 
 def log_info(msg):
     """Log info to stdout and file."""
@@ -144,6 +195,17 @@ def log_error(msg):
     """Log error to stderr and file."""
     print(f"[ERROR] {msg}", file=sys.stderr)
     _write_log("ERROR", msg)
+    _flush_log()
+
+
+# The book is written by Go's json.MarshalIndent, so field order is fixed
+# (book.go: BookPosition / BookMove) and quotes inside strings are escaped.
+# That lets get_learning_stats() scan the raw bytes instead of building
+# the whole dict tree.
+_FEN_KEY = b'"fen":'
+_LEARNED_RE = re.compile(rb'"our_games":\s*[1-9]')
+_OUR_COUNTS_RE = re.compile(rb'"our_games":\s*([1-9]\d*),\s*"our_wins":\s*(\d+),'
+                            rb'\s*"our_losses":\s*(\d+),\s*"our_draws":\s*(\d+)')
 
 
 def get_learning_stats():
@@ -157,57 +219,51 @@ def get_learning_stats():
         "total_our_draws": 0,
     }
 
-    if not BOOK_PATH.exists():
+    try:
+        st = BOOK_PATH.stat()
+    except FileNotFoundError:
         return stats
 
+    # Any write to the book changes its mtime/size, so an unchanged book
+    # (the "before" stats of back-to-back runs) skips the scan entirely
+    key = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    try:
+        cached = _json.loads(STATS_CACHE_PATH.read_bytes())
+        if cached["mtime_ns"] == key["mtime_ns"] and cached["size"] == key["size"]:
+            return cached["stats"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
     try:
-        with open(BOOK_PATH) as f:
-            book = json.load(f)
-
-        positions = book.get("positions", {})
-        stats["total_positions"] = len(positions)
-
-        for fen, pos in positions.items():
-            has_learning = False
-            for move in pos.get("moves", []):
-                our_games = move.get("our_games", 0)
-                if our_games > 0:
-                    has_learning = True
-                    stats["total_our_games"] += our_games
-                    stats["total_our_wins"] += move.get("our_wins", 0)
-                    stats["total_our_losses"] += move.get("our_losses", 0)
-                    stats["total_our_draws"] += move.get("our_draws", 0)
-
-            if has_learning:
-                stats["positions_with_learning"] += 1
-
-    except (json.JSONDecodeError, IOError) as e:
+        data = BOOK_PATH.read_bytes()
+    except IOError as e:
         log_error(f"Failed to read book: {e}")
+        return stats
 
-    return stats
+    # Every position object carries a "fen" field; split on it to count
+    # positions, then pull the move counters straight out of the bytes
+    chunks = data.split(_FEN_KEY)[1:]
+    stats["total_positions"] = len(chunks)
+    stats["positions_with_learning"] = sum(1 for c in chunks if _LEARNED_RE.search(c))
+    for games, wins, losses, draws in _OUR_COUNTS_RE.findall(data):
+        stats["total_our_games"] += int(games)
+        stats["total_our_wins"] += int(wins)
+        stats["total_our_losses"] += int(losses)
+        stats["total_our_draws"] += int(draws)
 
+    try:
+        tmp = STATS_CACHE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps({**key, "stats": stats}))
+        os.replace(tmp, STATS_CACHE_PATH)
+    except OSError:
+        pass  # No cache just means rescanning the book next time
 
-def generate_go_test(num_games, depth_white=6, depth_black=6, contempt_white=None, contempt_black=None):
-    """Generate Go test file that plays N complete AI vs AI games.
+    return stats
 
-    depth_white: search depth for White
-    depth_black: search depth for Black
-    contempt_white: White's draw value (0=aggressive, 0.5=neutral), or None for symmetric
-    contempt_black: Black's draw value (0=aggressive, 0.5=neutral), or None for symmetric
-    """
 
-    # Build contempt setup code
-    if contempt_white is not None and contempt_black is not None:
-        contempt_setup = f"SetAsymmetricContempt({contempt_white}, {contempt_black})"
-        contempt_white_cp = int((0.5 - contempt_white) * 100)
-        contempt_black_cp = int((0.5 - contempt_black) * 100)
-        contempt_log = f'fmt.Printf("[INFO] Depth: W={depth_white} B={depth_black}, Contempt: W=%dcp B=%dcp\\n", {contempt_white_cp}, {contempt_black_cp})'
-    else:
-        contempt_setup = f"SetContempt({DRAW_VALUE})"
-        contempt_cp = int((0.5 - DRAW_VALUE) * 100)
-        contempt_log = f'fmt.Printf("[INFO] Depth: W={depth_white} B={depth_black}, Contempt: %dcp\\n", {contempt_cp})'
-
-    test_code = f'''package main
+# Go source for the generated TestAutoGames file. Go's own braces are
+# doubled for str.format; generate_go_test() fills in the {fields}.
+_GO_TEST_TEMPLATE = '''package main
 
 import (
 	"fmt"
@@ -332,11 +388,11 @@ func playOneGame(gameNum int) (GameResult, int) {{
 		ply := len(history) + 1
 		start := time.Now()
 		var searchResult SearchResult
-		if board.SideToMove == White {{{{
-			searchResult = SearchWithBook(board, ply, {depth_white}, {WORKERS})
-		}}}} else {{{{
-			searchResult = SearchWithBook(board, ply, {depth_black}, {WORKERS})
-		}}}}
+		if board.SideToMove == White {{
+			searchResult = SearchWithBook(board, ply, {depth_white}, {workers})
+		}} else {{
+			searchResult = SearchWithBook(board, ply, {depth_black}, {workers})
+		}}
 		elapsed := time.Since(start)
 
 		if searchResult.BestMove.IsNull() {{
@@ -421,12 +477,100 @@ func isInsufficientMaterial(b *Board) bool {{
 }}
 '''
 
+
+def generate_go_test(num_games, depth_white=6, depth_black=6, contempt_white=None, contempt_black=None):
+    """Generate Go test file that plays N complete AI vs AI games.
+
+    depth_white: search depth for White
+    depth_black: search depth for Black
+    contempt_white: White's draw value (0=aggressive, 0.5=neutral), or None for symmetric
+    contempt_black: Black's draw value (0=aggressive, 0.5=neutral), or None for symmetric
+    """
+
+    # Build contempt setup code
+    if contempt_white is not None and contempt_black is not None:
+        contempt_setup = f"SetAsymmetricContempt({contempt_white}, {contempt_black})"
+        contempt_white_cp = int((0.5 - contempt_white) * 100)
+        contempt_black_cp = int((0.5 - contempt_black) * 100)
+        contempt_log = f'fmt.Printf("[INFO] Depth: W={depth_white} B={depth_black}, Contempt: W=%dcp B=%dcp\\n", {contempt_white_cp}, {contempt_black_cp})'
+    else:
+        contempt_setup = f"SetContempt({DRAW_VALUE})"
+        contempt_cp = int((0.5 - DRAW_VALUE) * 100)
+        contempt_log = f'fmt.Printf("[INFO] Depth: W={depth_white} B={depth_black}, Contempt: %dcp\\n", {contempt_cp})'
+
+    test_code = _GO_TEST_TEMPLATE.format_map({
+        "num_games": num_games,
+        "depth_white": depth_white,
+        "depth_black": depth_black,
+        "workers": WORKERS,
+        "contempt_setup": contempt_setup,
+        "contempt_log": contempt_log,
+    })
+
     with open(TEST_FILE, 'w') as f:
         f.write(test_code)
 
     log_debug(f"Generated test file: {TEST_FILE}")
 
 
+def _h_skip(line):
+    """Go test framework noise."""
+
+
+# "[LEVEL] message" lines from the Go side, split in one C-level match
+_TAGGED_RE = re.compile(rb"\[(INFO|DEBUG|ERROR)\]\s*(.*)")
+
+
+def _h_tagged(line):
+    """Lines that already have our log format: show and log them."""
+    print(line.decode("utf-8", "replace"), flush=True)
+    m = _TAGGED_RE.match(line)
+    _write_log(m[1].decode(), m[2].decode("utf-8", "replace"))
+
+
+def _h_debug(line):
+    if DEBUG:
+        _h_tagged(line)
+    else:
+        _write_log("DEBUG", line.decode("utf-8", "replace"))  # Still log to file
+
+
+def _h_other(line):
+    """Anything else - show as debug."""
+    if line:
+        log_debug(line.decode("utf-8", "replace"))
+        sys.stdout.flush()
+
+
+# Keyed on the first 7 bytes of a line, so routing is one dict lookup
+_LINE_HANDLERS = {
+    b"[DEBUG]": _h_debug,
+    b"[INFO] ": _h_tagged,
+    b"[ERROR]": _h_tagged,
+    b"=== RUN": _h_skip,
+    b"--- PAS": _h_skip,
+    b"PASS": _h_skip,
+}
+# Go's summary lines ("ok  \tpkg", "FAIL\tpkg") are shorter than the key
+_SHORT_NOISE = (b"PASS", b"ok", b"FAIL")
+
+
+def _handle_go_line(line):
+    """Route one raw line of go test output to the terminal and log."""
+    line = line.rstrip()
+    handler = _LINE_HANDLERS.get(bytes(line[:7]))
+    if handler is None:
+        # "[INFO]" is one byte shorter than the other tags, so "[INFO]msg"
+        # or a bare "[INFO]" misses the 7-byte key
+        if line.startswith(b"[INFO]"):
+            handler = _h_tagged
+        elif line.startswith(_SHORT_NOISE):
+            handler = _h_skip
+        else:
+            handler = _h_other
+    handler(line)
+
+
 def run_games():
     """Execute go test and stream output to terminal."""
 
@@ -437,37 +581,33 @@ def run_games():
         env = os.environ.copy()
         env["PYTHONUNBUFFERED"] = "1"
 
+        # Raw binary pipe: lines are split on bytes and only decoded when
+        # they are actually printed or logged
         process = subprocess.Popen(
             ["go", "test", "-v", "-run", "TestAutoGames", "-timeout", "0"],
             cwd=CHESS_DIR,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
+            bufsize=0,
             env=env
         )
 
-        for line in process.stdout:
-            line = line.rstrip()
-            # Pass through lines that already have our log format
-            if line.startswith("[INFO]") or line.startswith("[DEBUG]") or line.startswith("[ERROR]"):
-                if line.startswith("[DEBUG]") and not DEBUG:
-                    _write_log("DEBUG", line)  # Still log to file
-                    continue
-                print(line, flush=True)
-                # Extract level and message for file logging
-                level = line.split("]")[0][1:]
-                msg = line.split("]", 1)[1].strip() if "]" in line else line
-                _write_log(level, msg)
-            # Skip Go test framework noise
-            elif line.startswith("=== RUN") or line.startswith("--- PASS") or line.startswith("PASS"):
-                pass
-            elif line.startswith("ok") or line.startswith("FAIL"):
-                pass
-            elif line.strip():
-                # Other output - show as debug
-                log_debug(line)
-                sys.stdout.flush()
+        fd = process.stdout.fileno()
+        os.set_blocking(fd, True)
+        buf = bytearray()
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            buf += chunk
+            if b"\n" not in chunk:
+                continue
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                _handle_go_line(line)
+        if buf:
+            _handle_go_line(buf)
+        process.stdout.close()
 
         process.wait()
         if process.returncode != 0:
@@ -500,8 +640,7 @@ def print_summary(before, after):
     # Show recent games from the book
     if BOOK_PATH.exists():
         try:
-            with open(BOOK_PATH) as f:
-                book = json.load(f)
+            book = _json.loads(BOOK_PATH.read_bytes())
             games = book.get('games', [])
             if games:
                 log_info(f"=== Recent Games ({len(games)} total) ===")
@@ -533,16 +672,13 @@ def reset_book():
 
 def main():
     # Handle reset flag first
-    if "--reset" in sys.argv:
+    if ARGS.reset:
         reset_book()
         # If only resetting (no game count), exit
-        args = [a for a in sys.argv[1:] if not a.startswith("-")]
-        if not args:
+        if ARGS.num_games is None:
             return 0
 
-    # Parse args
-    args = [a for a in sys.argv[1:] if not a.startswith("-")]
-    num_games = int(args[0]) if args else 5
+    num_games = 5 if ARGS.num_games is None else ARGS.num_games
 
     depth_str = f"depth={DEPTH_WHITE}" if DEPTH_WHITE == DEPTH_BLACK else f"W={DEPTH_WHITE}/B={DEPTH_BLACK}"
 
@@ -5,22 +5,14 @@ Concurrent DFS Extension - Go Build Script
 Builds the go_dfs extension using CGO to create a shared library.
 """
 
-import subprocess
-import sys
 import os
+import sys
 from pathlib import Path
 
-TARGET = "go_dfs.so"
-SCRIPT_DIR = Path(__file__).parent.resolve()
-
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import CACHE_DIR, main, report, run
 
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[go_dfs] {desc}")
-    print(f"  $ {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=SCRIPT_DIR, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED:\n{result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
+TARGET = "go_dfs.so"
 
 
 def build() -> int:
@@ -28,47 +20,22 @@ def build() -> int:
     env = os.environ.copy()
     env["CGO_ENABLED"] = "1"
 
-    # Build shared library
-    cmd = [
-        "go", "build",
-        "-buildmode=c-shared",
-        "-o", TARGET,
-        ".",
-    ]
-
-    print(f"[go_dfs] Building {TARGET}...")
-    result = subprocess.run(cmd, cwd=SCRIPT_DIR, env=env, capture_output=True, text=True)
+    # Pin the build and module caches to a persistent location so fresh
+    # shells/containers reuse cached cgo and link actions. Keep
+    # CGO_LDFLAGS fixed (Go's own default) since it feeds the action IDs.
+    env.setdefault("GOCACHE", str(CACHE_DIR / "gocache"))
+    env.setdefault("GOMODCACHE", str(CACHE_DIR / "gomodcache"))
+    env.setdefault("CGO_LDFLAGS", "-g -O2")
+    for var in ("GOCACHE", "GOMODCACHE"):
+        Path(env[var]).mkdir(parents=True, exist_ok=True)
 
-    if result.returncode != 0:
-        print(f"FAILED:\n{result.stderr or result.stdout}", file=sys.stderr)
-        return 1
-
-    print(f"[go_dfs] Built {TARGET}")
-
-    # Verify output
-    so_path = SCRIPT_DIR / TARGET
-    if so_path.exists():
-        size = so_path.stat().st_size
-        print(f"[go_dfs] Output: {TARGET} ({size:,} bytes)")
-    else:
-        print(f"[go_dfs] ERROR: {TARGET} not created", file=sys.stderr)
+    # Build shared library
+    if run(["go", "build", "-buildmode=c-shared", "-o", TARGET, "."],
+           f"Building {TARGET}", env=env) != 0:
         return 1
 
-    return 0
-
-
-def clean():
-    for pattern in [TARGET, "*.h", "*.o"]:
-        for f in SCRIPT_DIR.glob(pattern):
-            if f.name != "bridge.c":  # Keep bridge.c
-                f.unlink()
-                print(f"Removed {f.name}")
+    return report(TARGET)
 
 
 if __name__ == "__main__":
-    os.chdir(SCRIPT_DIR)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, [TARGET, "*.h", "*.o"], Path(__file__).parent)
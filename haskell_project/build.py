@@ -6,56 +6,71 @@ Builds with GHC's runtime system properly linked.
 Uses -flink-rts for static RTS linking and rpath for dynamic libs.
 """
 
+import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 
-TARGET = "haskell_project.so"
-CFLAGS = ["-O2", "-fPIC", "-Wall"]
-
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import cached_json, compile_step, main, report, run, run_parallel
 
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[haskell_project] {desc}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED: {result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
+TARGET = "haskell_project.so"
+CFLAGS = ["-O2", "-fPIC", "-Wall", "-pipe"]
+# Parallel module compilation, plus a bigger allocation area and all
+# cores for GHC's own runtime
+GHC_PARALLEL = [f"-j{os.cpu_count() or 4}", "+RTS", "-A64m", "-N", "-RTS"]
 
 
-def get_ghc_libdir() -> str:
-    """Get GHC's library directory for rpath."""
-    result = subprocess.run(["ghc", "--print-libdir"],
+def _query_ghc_rpath(ghc: str) -> str:
+    result = subprocess.run([ghc, "--print-libdir"],
                            capture_output=True, text=True)
     if result.returncode != 0:
         raise RuntimeError("Failed to get GHC libdir")
-    return result.stdout.strip()
+
+    # Pattern: x86_64-linux-ghc-X.Y.Z
+    ghc_arch_dirs = list(Path(result.stdout.strip()).glob("x86_64-linux-ghc-*"))
+    if not ghc_arch_dirs:
+        raise RuntimeError("Could not find GHC arch directory")
+    return str(ghc_arch_dirs[0])
+
+
+def find_ghc_rpath() -> str:
+    """Return GHC's version-specific library directory, for rpath.
+
+    Asking means starting GHC and globbing its libdir, so the answer is
+    cached keyed by the ghc binary's path and mtime. Raises RuntimeError
+    if it can't be found.
+    """
+    ghc = shutil.which("ghc")
+    if not ghc:
+        raise RuntimeError("ghc not found")
+    key = [ghc, os.stat(ghc).st_mtime_ns]
+    return cached_json("ghc_rpath.json", key, lambda: _query_ghc_rpath(ghc))
 
 
 def build() -> int:
-    # Get GHC paths
+    # Find the GHC version-specific directory for rpath
     try:
-        ghc_libdir = get_ghc_libdir()
+        ghc_rpath = find_ghc_rpath()
     except RuntimeError as e:
         print(f"ERROR: {e}", file=sys.stderr)
         return 1
 
-    # Find the GHC version-specific directory for rpath
-    # Pattern: x86_64-linux-ghc-X.Y.Z
-    ghc_arch_dirs = list(Path(ghc_libdir).glob("x86_64-linux-ghc-*"))
-    if not ghc_arch_dirs:
-        print("ERROR: Could not find GHC arch directory", file=sys.stderr)
+    # 1. Compile bridge.c and Project.hs concurrently (independent)
+    # -dynamic/-fPIC: objects for a shared library
+    if run_parallel([
+        compile_step("bridge.c", CFLAGS),
+        (["ghc", "-O2", "-dynamic", "-fPIC", "-c", *GHC_PARALLEL, "Project.hs"],
+         "Compiling Project.hs"),
+    ]) != 0:
         return 1
-    ghc_rpath = str(ghc_arch_dirs[0])
 
-    # 1. Compile bridge.c
-    if run(["gcc"] + CFLAGS + ["-c", "-o", "bridge.o", "bridge.c"],
-           "Compiling bridge.c") != 0:
-        return 1
-
-    # 2. Build with GHC
+    # 2. Link with GHC
+    # Project.hs (not Project.o) keeps GHC in --make mode, which works out
+    # the packages it imports (directory, filepath) and links them in;
+    # the recompilation check reuses the Project.o built above.
     # -shared: build shared library
-    # -dynamic: use dynamic linking
-    # -fPIC: position independent code
     # -flink-rts: link RTS into the shared library
     # -optl-Wl,-rpath: set runtime library path
     if run(["ghc", "-O2", "-shared", "-dynamic", "-fPIC", "-flink-rts",
@@ -64,24 +79,8 @@ def build() -> int:
            "Building Haskell shared library") != 0:
         return 1
 
-    print(f"[haskell_project] Built {TARGET}")
-    return 0
-
-
-def clean():
-    here = Path(__file__).parent
-    patterns = [TARGET, "*.o", "*.hi", "*_stub.h"]
-    for pattern in patterns:
-        for f in here.glob(pattern):
-            f.unlink()
-            print(f"Removed {f.name}")
+    return report(TARGET)
 
 
 if __name__ == "__main__":
-    import os
-    os.chdir(Path(__file__).parent)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, [TARGET, "*.o", "*.hi", "*_stub.h"], Path(__file__).parent)
@@ -7,57 +7,37 @@ Two-stage build:
 2. C bridge links against Pascal library with rpath for runtime
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import compile_step, main, report, run, run_parallel
+
 TARGET = "pascal_multicursor.so"
 PASCAL_LIB = "libpascal_mc.so"
-CFLAGS = ["-O2", "-fPIC", "-Wall"]
-
-
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[pascal_multicursor] {desc}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED: {result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
+CFLAGS = ["-O2", "-fPIC", "-Wall", "-pipe"]
 
 
 def build() -> int:
-    # 1. Build Pascal as shared library
-    if run(["fpc", "-O2", "-Cg", f"-o{PASCAL_LIB}", "multicursor.pas"],
-           "Compiling Pascal to shared library") != 0:
+    # 1. Build Pascal as shared library; the bridge object doesn't need
+    # it until link time, so compile both concurrently
+    if run_parallel([
+        (["fpc", "-O2", "-Cg", f"-o{PASCAL_LIB}", "multicursor.pas"],
+         "Compiling Pascal to shared library"),
+        compile_step("bridge.c", CFLAGS),
+    ]) != 0:
         return 1
 
-    # 2. Build bridge and link against Pascal library
+    # 2. Link bridge against Pascal library
     # -Wl,-rpath,'$ORIGIN' ensures the Pascal lib is found at runtime
-    if run(["gcc"] + CFLAGS + [
-            "-shared", "-o", TARGET, "bridge.c",
-            "-L.", "-lpascal_mc",
-            "-Wl,-rpath,$ORIGIN"
-           ],
+    if run(["gcc", "-shared", "-o", TARGET, "bridge.o",
+            "-L.", "-lpascal_mc", "-Wl,-rpath,$ORIGIN"],
            "Linking bridge with Pascal library") != 0:
         return 1
 
-    print(f"[pascal_multicursor] Built {TARGET}")
-    return 0
-
-
-def clean():
-    here = Path(__file__).parent
-    patterns = [TARGET, PASCAL_LIB, "*.o", "*.ppu", "link.res", "ppas.sh"]
-    for pattern in patterns:
-        for f in here.glob(pattern):
-            f.unlink()
-            print(f"Removed {f.name}")
+    return report(TARGET)
 
 
 if __name__ == "__main__":
-    import os
-    os.chdir(Path(__file__).parent)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, [TARGET, PASCAL_LIB, "*.o", "*.ppu", "link.res", "ppas.sh"],
+         Path(__file__).parent)
@@ -7,53 +7,33 @@ Compiles:
   2. bridge.c + libtextutils.so -> pascal_textutils.so (final extension)
 """
 
-import subprocess
-import sys
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from _build_common import (compile_step, find_uep_include, main, report, run,
+                           run_parallel)
+
 TARGET = "pascal_textutils.so"
 PASCAL_LIB = "libtextutils.so"
 # API version from env or default to 4
 API_VERSION = os.environ.get("UEMACS_API_VERSION", "4")
-
-# Find μEmacs include path
-SCRIPT_DIR = Path(__file__).parent.resolve()
-UEMACS_DIR = SCRIPT_DIR.parent.parent.parent / "μEmacs"
-INCLUDE_PATH = UEMACS_DIR / "include"
-
-INCLUDE_PATHS = [
-    INCLUDE_PATH,
-    Path("/usr/local/include"),
-    Path("/usr/include"),
-]
-
-
-def find_include() -> Path | None:
-    for inc in INCLUDE_PATHS:
-        if (inc / "uep" / "extension_api.h").exists():
-            return inc
-    return None
-
-
-def run(cmd: list[str], desc: str) -> int:
-    print(f"[pascal_textutils] {desc}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"FAILED: {result.stderr or result.stdout}", file=sys.stderr)
-    return result.returncode
+CFLAGS = ["-O2", "-fPIC", "-pipe", f"-DUEMACS_API_VERSION_BUILD={API_VERSION}"]
 
 
 def build() -> int:
-    here = Path(__file__).parent.resolve()
-
-    # Step 1: Compile Pascal to shared library
-    pas_files = list(here.glob("*.pas"))
+    pas_files = sorted(Path(".").glob("*.pas"))
     if not pas_files:
         print("[pascal_textutils] No .pas files found", file=sys.stderr)
         return 1
 
-    # Use fpc to compile Pascal library
+    inc = find_uep_include()
+    if not inc:
+        print("[pascal_textutils] WARNING: Could not find μEmacs include path", file=sys.stderr)
+
+    # Step 1: Compile the Pascal library and the C bridge concurrently;
+    # they only meet at link time
     pas_cmd = [
         "fpc",
         "-Cg",           # Generate PIC code
@@ -62,44 +42,20 @@ def build() -> int:
         "-o" + PASCAL_LIB,
         str(pas_files[0])
     ]
-
-    if run(pas_cmd, f"Compiling {pas_files[0].name}") != 0:
+    if run_parallel([
+        (pas_cmd, f"Compiling {pas_files[0].name}"),
+        compile_step("bridge.c", CFLAGS, inc),
+    ]) != 0:
         return 1
 
-    # Step 2: Compile C bridge and link with Pascal library
-    inc = find_include()
-    if not inc:
-        print("[pascal_textutils] WARNING: Could not find μEmacs include path", file=sys.stderr)
-
-    c_cmd = ["gcc", "-shared", "-fPIC", "-O2", f"-DUEMACS_API_VERSION_BUILD={API_VERSION}", "-o", TARGET]
-    if inc:
-        c_cmd.extend(["-I", str(inc)])
-    c_cmd.extend([
-        "bridge.c",
-        "-L.", f"-l:libtextutils.so",
-        "-Wl,-rpath,$ORIGIN"
-    ])
-
-    if run(c_cmd, "Linking bridge with Pascal library") != 0:
+    # Step 2: Link bridge with Pascal library
+    if run(["gcc", "-shared", "-o", TARGET, "bridge.o",
+            "-L.", "-l:libtextutils.so", "-Wl,-rpath,$ORIGIN"],
+           "Linking bridge with Pascal library") != 0:
         return 1
 
-    print(f"[pascal_textutils] Built {TARGET}")
-    return 0
-
-
-def clean():
-    here = Path(__file__).parent
-    for pattern in [TARGET, PASCAL_LIB, "*.o", "*.ppu", "link.res", "textutils.o"]:
-        for f in here.glob(pattern):
-            f.unlink()
-            print(f"Removed {f.name}")
+    return report(TARGET)
 
 
 if __name__ == "__main__":
-    import os
-    os.chdir(Path(__file__).parent)
-
-    if len(sys.argv) > 1 and sys.argv[1] == "clean":
-        clean()
-    else:
-        sys.exit(build())
+    main(build, [TARGET, PASCAL_LIB, "*.o", "*.ppu", "link.res"], Path(__file__).parent)